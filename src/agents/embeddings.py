@@ -1,10 +1,68 @@
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional
+
 from langchain_ollama import OllamaEmbeddings
+from pydantic import PrivateAttr
 
 from config.settings_config import get_settings
 
 
-def get_lang_store_embeddings() -> tuple[OllamaEmbeddings, int]:
-    embeddings = OllamaEmbeddings(
+class CachedOllamaEmbeddings(OllamaEmbeddings):
+    """
+    `OllamaEmbeddings` that keeps an in-memory LRU of already embedded queries.
+
+    Documents are embedded once, at ingestion, so they bypass the cache rather than
+    evicting the query vectors it exists for.
+    """
+
+    cache_size: int = 10_000
+
+    # vectors are kept as float32 arrays, a quarter of the size of a list of floats
+    _cache: "OrderedDict[str, array]" = PrivateAttr(default_factory=OrderedDict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def _cache_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is None:
+                return None
+            self._cache.move_to_end(key)
+            return vector.tolist()
+
+    def _cache_put(self, key: str, vector: List[float]) -> None:
+        with self._lock:
+            self._cache[key] = array("f", vector)
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._cache_key(text)
+        vector = self._cache_get(key)
+        if vector is None:
+            vector = super().embed_query(text)
+            self._cache_put(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._cache_key(text)
+        vector = self._cache_get(key)
+        if vector is None:
+            vector = await super().aembed_query(text)
+            self._cache_put(key, vector)
+        return vector
+
+
+@lru_cache()
+def get_lang_store_embeddings() -> tuple[CachedOllamaEmbeddings, int]:
+    embeddings = CachedOllamaEmbeddings(
         model=get_settings().lang_store_embeddings_model,
         base_url=str(get_settings().ollama_base_url),
     )
@@ -1,9 +1,8 @@
-from langchain_ollama import ChatOllama
 from langgraph.graph.state import CompiledStateGraph
 from langgraph_supervisor import create_supervisor
 
-from agents.uploaded_files_agent import get_uploaded_files_agent
 from config.settings_config import get_settings
+from core.llm_cache import get_chat_model
 
 SUPERVISOR_NAME = "supervisor"
 
@@ -37,19 +36,29 @@ You are **My Personal AI**, a supervisor agent responsible for delegating all us
 
 
 async def build_supervisor_agent(
-    store, checkpointer
+    store, checkpointer, uploaded_files_agent: CompiledStateGraph
 ) -> tuple[CompiledStateGraph, dict[str, list[str]]]:
     # agents
-    uploaded_files_agent = await get_uploaded_files_agent()
+    agents = [uploaded_files_agent]
+
+    confirm_tools: dict[str, list[str]] = {}
+
+    # The supervisor prompt always delegates to its only agent, so the routing
+    # LLM call can be skipped by serving that agent directly
+    if get_settings().supervisor_passthrough and len(agents) == 1:
+        supervisor = agents[0].copy(
+            update={"checkpointer": checkpointer, "store": store}
+        )
+        return supervisor, confirm_tools
 
     # model
-    model = ChatOllama(
+    model = get_chat_model(
         model=get_settings().supervisor_agent_model,
         temperature=0,
     )
 
     supervisor = create_supervisor(
-        agents=[uploaded_files_agent],
+        agents=agents,
         model=model,
         tools=[],
         supervisor_name=SUPERVISOR_NAME,
@@ -61,6 +70,4 @@ async def build_supervisor_agent(
         store=store,
     )
 
-    confirm_tools: dict[str, list[str]] = {}
-
     return supervisor, confirm_tools
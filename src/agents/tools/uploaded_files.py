@@ -3,11 +3,22 @@ from typing import Dict, List
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 
-from core.qdrant import keyword_search_from_qdrant, search_from_qdrant
+from core.qdrant import (
+    acompare_search_from_qdrant,
+    akeyword_search_from_qdrant,
+    asearch_from_qdrant,
+)
+
+COMPARE_SEARCH_METHODS = (
+    "hybrid_search_uploaded_files",
+    "dense_search_uploaded_files",
+    "sparse_search_uploaded_files",
+    "keyword_search_from_uploaded_files",
+)
 
 
 @tool
-def hybrid_search_uploaded_files(
+async def hybrid_search_uploaded_files(
     config: RunnableConfig,
     query: str,
     limit: int = 5,
@@ -49,7 +60,7 @@ def hybrid_search_uploaded_files(
         if not files:
             return []
 
-        results = search_from_qdrant(
+        results = await asearch_from_qdrant(
             query=query,
             k=limit,
             alpha=alpha,
@@ -61,7 +72,7 @@ def hybrid_search_uploaded_files(
 
 
 @tool
-def dense_search_uploaded_files(
+async def dense_search_uploaded_files(
     config: RunnableConfig, query: str, limit: int = 5
 ) -> List[Dict]:
     """
@@ -100,7 +111,7 @@ def dense_search_uploaded_files(
         if not files:
             return []
 
-        results = search_from_qdrant(
+        results = await asearch_from_qdrant(
             query=query,
             k=limit,
             alpha=1.0,
@@ -112,7 +123,7 @@ def dense_search_uploaded_files(
 
 
 @tool
-def sparse_search_uploaded_files(
+async def sparse_search_uploaded_files(
     config: RunnableConfig, query: str, limit: int = 5
 ) -> List[Dict]:
     """
@@ -152,7 +163,7 @@ def sparse_search_uploaded_files(
         if not files:
             return []
 
-        results = search_from_qdrant(
+        results = await asearch_from_qdrant(
             query=query,
             k=limit,
             alpha=0.0,
@@ -164,7 +175,7 @@ def sparse_search_uploaded_files(
 
 
 @tool
-def keyword_search_from_uploaded_files(
+async def keyword_search_from_uploaded_files(
     config: RunnableConfig, query: str, limit: int = 5
 ) -> List[Dict]:
     """
@@ -206,7 +217,7 @@ def keyword_search_from_uploaded_files(
         if not files:
             return []
 
-        results = keyword_search_from_qdrant(
+        results = await akeyword_search_from_qdrant(
             query=query,
             limit=limit,
             metadata_filter={"file_id": files},
@@ -217,7 +228,8 @@ def keyword_search_from_uploaded_files(
         return [{"error": f"Keyword search failed: {str(e)}"}]
 
 
-def compare_search_methods_for_uploaded_files(
+@tool
+async def compare_search_methods_for_uploaded_files(
     config: RunnableConfig, query: str, limit: int = 3
 ) -> Dict[str, List[Dict]]:
     """
@@ -258,44 +270,21 @@ def compare_search_methods_for_uploaded_files(
         - Gracefully handles missing files and search failures
         - Alpha parameter controls the balance between dense and sparse search methods
         - Results are ranked by relevance scores specific to each search method
+        - All four searches are sent to Qdrant in a single batched request
     """
     try:
         configurable = config.get("configurable", {})
         files: List[str] = configurable.get("uploaded_files", [])
 
         if not files:
-            return {
-                "hybrid_search_uploaded_files": [],
-                "dense_search_uploaded_files": [],
-                "sparse_search_uploaded_files": [],
-                "keyword_search_from_uploaded_files": [],
-            }
-
-        return {
-            "hybrid_search_uploaded_files": search_from_qdrant(
-                query=query,
-                k=limit,
-                alpha=0.5,
-                metadata_filter={"file_id": files},
-            ),
-            "dense_search_uploaded_files": search_from_qdrant(
-                query=query,
-                k=limit,
-                alpha=1.0,
-                metadata_filter={"file_id": files},
-            ),
-            "sparse_search_uploaded_files": search_from_qdrant(
-                query=query,
-                k=limit,
-                alpha=0.0,
-                metadata_filter={"file_id": files},
-            ),
-            "keyword_search_from_uploaded_files": keyword_search_from_qdrant(
-                query=query,
-                limit=limit,
-                metadata_filter={"file_id": files},
-            ),
-        }
+            return {method: [] for method in COMPARE_SEARCH_METHODS}
+
+        results = await acompare_search_from_qdrant(
+            query=query,
+            k=limit,
+            metadata_filter={"file_id": files},
+        )
+        return dict(zip(COMPARE_SEARCH_METHODS, results))
 
     except Exception as e:
-        return {"error": [{"error": f"Keyword search failed: {str(e)}"}]}
+        return {"error": [{"error": f"Search failed: {str(e)}"}]}
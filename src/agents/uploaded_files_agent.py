@@ -1,5 +1,6 @@
-from async_lru import alru_cache
-from langchain_ollama import ChatOllama
+from langchain_core.messages import SystemMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import END, START, MessagesState, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 from langgraph.prebuilt import create_react_agent
 
@@ -11,6 +12,7 @@ from agents.tools.uploaded_files import (
     sparse_search_uploaded_files,
 )
 from config.settings_config import get_settings
+from core.llm_cache import get_chat_model
 
 UPLOADED_FILES_AGENT_NAME = "uploaded_files_agent"
 
@@ -82,8 +84,11 @@ You have access to multiple search tools, each optimized for different types of
 Remember: Your goal is to help users efficiently find the information they need from their uploaded files by selecting the optimal search strategy and presenting results clearly.
 """
 
+no_uploaded_files_prompt = """
+No files have been uploaded in this session, so there is nothing to search. Answer the user's question from general knowledge, and mention that they can upload files if they want answers based on their own documents.
+"""
+
 
-@alru_cache()
 async def get_uploaded_files_agent() -> CompiledStateGraph:
     tools = [
         hybrid_search_uploaded_files,
@@ -93,16 +98,41 @@ async def get_uploaded_files_agent() -> CompiledStateGraph:
         compare_search_methods_for_uploaded_files,
     ]
 
-    model = ChatOllama(
-        model=get_settings().uploaded_files_agent_model,  # type: ignore
-        temperature=0,  # type: ignore
+    model = get_chat_model(
+        model=get_settings().uploaded_files_agent_model,
+        temperature=0,
     )
 
-    agent = create_react_agent(
+    search_agent = create_react_agent(
         model=model,
         tools=tools,
         prompt=uploaded_files_agent_prompt,
         name=UPLOADED_FILES_AGENT_NAME,
     )
 
+    async def direct_response(state: MessagesState) -> dict:
+        response = await model.ainvoke(
+            [SystemMessage(content=no_uploaded_files_prompt), *state["messages"]]
+        )
+        response.name = UPLOADED_FILES_AGENT_NAME
+        return {"messages": [response]}
+
+    def route_by_uploaded_files(state: MessagesState, config: RunnableConfig) -> str:
+        # Without uploaded files every search tool returns nothing, so skip the
+        # tool-calling loop and answer directly
+        if config.get("configurable", {}).get("uploaded_files"):
+            return "search_agent"
+        return "direct_response"
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("search_agent", search_agent)
+    builder.add_node("direct_response", direct_response)
+    builder.add_conditional_edges(
+        START, route_by_uploaded_files, ["search_agent", "direct_response"]
+    )
+    builder.add_edge("search_agent", END)
+    builder.add_edge("direct_response", END)
+
+    agent = builder.compile(name=UPLOADED_FILES_AGENT_NAME)
+
     return agent
@@ -1,15 +1,32 @@
 import logging
+from typing import Any, AsyncIterator
 
+import orjson
 from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
 from langchain_core.runnables import RunnableConfig
 from langgraph.graph import MessagesState
 from langgraph.graph.state import CompiledStateGraph
+from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _json_default(obj: Any) -> Any:
+    """Serialize values orjson can't handle natively, such as LangChain messages"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    return str(obj)
+
+
+async def _sse(events: AsyncIterator[Any]) -> AsyncIterator[bytes]:
+    """Format graph events as Server-Sent Events"""
+    async for event in events:
+        yield b"data: " + orjson.dumps(event, default=_json_default) + b"\n\n"
+
+
 @router.post("/invoke")
 async def invoke_graph(
     request: Request, payload: MessagesState, config: RunnableConfig
@@ -22,6 +39,9 @@ async def invoke_graph(
 @router.post("/stream")
 async def stream_graph(
     request: Request, payload: MessagesState, config: RunnableConfig
-):
+) -> StreamingResponse:
     supervisor_agent: CompiledStateGraph = request.app.state.supervisor_agent
-    return supervisor_agent.astream(payload, config=config)
+    return StreamingResponse(
+        _sse(supervisor_agent.astream_events(payload, config=config, version="v2")),
+        media_type="text/event-stream",
+    )
@@ -4,7 +4,7 @@ import uuid
 from fastapi import APIRouter, HTTPException, Request, status
 
 from api.v1.schema.upload import UploadFileChunkResponse
-from core.qdrant import delete_uploaded_documents
+from services.v1 import upload_service
 from services.v1.upload_service import upload_file_chunks
 
 logger = logging.getLogger(__name__)
@@ -12,8 +12,14 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.post("/upload/chunks", response_model=UploadFileChunkResponse)
-async def upload_chunks(request: Request):
+# response_model=None skips re-validating the already built response on every
+# chunk; the model is still documented in OpenAPI through `responses`
+@router.post(
+    "/upload/chunks",
+    response_model=None,
+    responses={200: {"model": UploadFileChunkResponse}},
+)
+async def upload_chunks(request: Request) -> UploadFileChunkResponse:
     file_id = request.headers.get("x-file-id")
     file_name = request.headers.get("x-filename")
     chunk_index = int(request.headers.get("x-chunk-index", 0))
@@ -36,4 +42,4 @@ async def upload_chunks(request: Request):
 
 @router.delete("/upload/{file_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_uploaded_file(file_id: str):
-    delete_uploaded_documents({"file_id": file_id})
+    upload_service.delete_uploaded_file(file_id)
@@ -1,9 +1,9 @@
 import logging
 from functools import lru_cache
-from typing import Annotated, List
+from typing import Annotated, List, Optional
 
 from pydantic import AnyHttpUrl, BeforeValidator, Field, ValidationError, computed_field
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +25,7 @@ class Settings(BaseSettings):
     uploaded_files_agent_model: Annotated[
         str, BeforeValidator(str.strip), Field(min_length=1)
     ]
+    supervisor_passthrough: bool = False
 
     # postgres
     postgres_database_url: Annotated[
@@ -41,9 +42,11 @@ class Settings(BaseSettings):
 
     # dir
     upload_temp_dir: Annotated[str, BeforeValidator(str.strip), Field(min_length=1)]
+    upload_stale_seconds: Annotated[int, Field(ge=0)] = 86400
 
     # qdrant
     qdrant_url: AnyHttpUrl
+    qdrant_grpc_port: Annotated[int, Field(ge=0)] = 6334
     qdrant_embeddings_model: Annotated[
         str, BeforeValidator(str.strip), Field(min_length=1)
     ]
@@ -52,10 +55,22 @@ class Settings(BaseSettings):
         str, BeforeValidator(str.strip), Field(min_length=1)
     ]
 
-    class ConfigDict:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        use_enum_values = True
+    # llm cache
+    redis_url: Optional[
+        Annotated[str, BeforeValidator(str.strip), Field(min_length=1)]
+    ] = None
+    llm_cache_ttl_seconds: Annotated[int, Field(ge=0)] = 3600
+    llm_cache_similarity_threshold: Annotated[float, Field(ge=0, le=1)] = 0.97
+    llm_cache_collection_name: Annotated[
+        str, BeforeValidator(str.strip), Field(min_length=1)
+    ] = "llm_cache"
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        use_enum_values=True,
+        frozen=True,
+    )
 
     @computed_field
     def project_info(self) -> str:
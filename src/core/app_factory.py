@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
 from api.monitoring.router import api_router as monitoring_api_router
 from api.v1.router import api_router as v1_api_router
@@ -17,6 +18,7 @@ def create_app() -> FastAPI:
         title=get_settings().project_name,
         version=get_settings().project_version,
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
 
     # Set up CORS middleware
@@ -1,4 +1,7 @@
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import AsyncExitStack, asynccontextmanager
 from typing import AsyncGenerator, Optional, Tuple, cast
 
@@ -6,10 +9,14 @@ from fastapi import FastAPI
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from langgraph.store.postgres import AsyncPostgresStore
 from langgraph.store.postgres.base import PoolConfig
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
 
 from agents.embeddings import get_lang_store_embeddings
 from agents.supervisor_agent import build_supervisor_agent
+from agents.uploaded_files_agent import get_uploaded_files_agent
 from config.settings_config import get_settings
+from core.llm_cache import llm_cache
 from core.qdrant import setup_qdrant
 from db.prisma.utils import get_db
 
@@ -45,12 +52,22 @@ class PersistentAsyncResources:
                 ),
             )
 
-            self.checkpointer = cast(
-                AsyncPostgresSaver,
-                await self._exit_stack.enter_async_context(
-                    AsyncPostgresSaver.from_conn_string(self.postgres_url)
-                ),
+            # Back the checkpointer with a pool rather than a single connection,
+            # so concurrent graph runs don't queue on each checkpoint write
+            checkpointer_pool = await self._exit_stack.enter_async_context(
+                AsyncConnectionPool(
+                    self.postgres_url,
+                    min_size=self.pool_config.get("min_size", 1),
+                    max_size=self.pool_config.get("max_size"),
+                    kwargs={
+                        "autocommit": True,
+                        "prepare_threshold": 0,
+                        "row_factory": dict_row,
+                    },
+                    open=False,
+                )
             )
+            self.checkpointer = AsyncPostgresSaver(checkpointer_pool)  # type: ignore
 
             # Setup - now mypy knows these are not None
             await self.store.setup()
@@ -91,6 +108,17 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # load qdrant
     setup_qdrant()
 
+    # load llm cache
+    if llm_cache is not None:
+        await llm_cache.setup()
+
+    # document parsing pool; spawn rather than fork, since forking a process
+    # with live event loop and client threads is unsafe
+    doc_pool = ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
     # embeddings
     embeddings, dims = get_lang_store_embeddings()
 
@@ -104,9 +132,10 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         embeddings,
         dims,
     ) as (store, checkpointer):
-        # build agents
+        # build agents once, up front, instead of on the first request
+        uploaded_files_agent = await get_uploaded_files_agent()
         supervisor_agent, confirm_tools = await build_supervisor_agent(
-            store, checkpointer
+            store, checkpointer, uploaded_files_agent
         )  # type: ignore
 
         # set data
@@ -114,6 +143,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         app.state.confirm_tools = confirm_tools
         app.state.store = store
         app.state.checkpointer = checkpointer
+        app.state.doc_pool = doc_pool
         app.state.ready = True
 
         # log
@@ -126,5 +156,8 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
 
     # Add cleanup tasks
     await db.disconnect()
+    if llm_cache is not None:
+        await llm_cache.close()
+    doc_pool.shutdown(cancel_futures=True)
 
     logger.info(f"{get_settings().project_info} completely shutdown")
@@ -0,0 +1,263 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Set
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+    messages_from_dict,
+    messages_to_dict,
+)
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_ollama import ChatOllama
+from qdrant_client.models import (
+    Distance,
+    FieldCondition,
+    Filter,
+    MatchValue,
+    PointStruct,
+    Range,
+    VectorParams,
+)
+from redis.asyncio import Redis
+
+from agents.embeddings import get_lang_store_embeddings
+from config.settings_config import get_settings
+from core.qdrant import async_client
+from core.utils import to_string
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "llm_cache:"
+PURGE_INTERVAL_SECONDS = 300
+
+
+class LLMCache:
+    """
+    Exact + semantic cache for chat model results.
+
+    Results are stored in Redis under a sha256 key of the full request. The last
+    human turn is also embedded into a Qdrant collection, scoped by the hash of the
+    preceding conversation, so near-duplicate questions can reuse a cached result.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        ttl_seconds: int,
+        similarity_threshold: float,
+        collection_name: str,
+    ):
+        self.redis = Redis.from_url(redis_url)
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.collection_name = collection_name
+        self.embeddings, self.dims = get_lang_store_embeddings()
+        self._next_purge_at = 0.0
+        # references to in-flight updates, so they aren't garbage collected
+        self._pending_updates: Set[asyncio.Task] = set()
+
+    async def setup(self) -> None:
+        if not await async_client.collection_exists(self.collection_name):
+            await async_client.create_collection(
+                collection_name=self.collection_name,
+                vectors_config=VectorParams(size=self.dims, distance=Distance.COSINE),
+            )
+            logger.info(f"Qdrant collection '{self.collection_name}' created.")
+
+    async def close(self) -> None:
+        await asyncio.gather(*self._pending_updates)
+        await self.redis.aclose()
+
+    async def _purge_expired(self) -> None:
+        """Delete semantic index points whose Redis entry has expired."""
+        now = time.time()
+        if now < self._next_purge_at:
+            return
+
+        self._next_purge_at = now + PURGE_INTERVAL_SECONDS
+        await async_client.delete(
+            collection_name=self.collection_name,
+            points_selector=Filter(
+                must=[FieldCondition(key="expires_at", range=Range(lt=now))]
+            ),
+            wait=False,
+        )
+
+    @staticmethod
+    def _normalize(message: BaseMessage) -> Dict[str, Any]:
+        # ids and response/usage metadata differ between otherwise identical turns
+        normalized: Dict[str, Any] = {"type": message.type, "content": message.content}
+        if isinstance(message, AIMessage) and message.tool_calls:
+            normalized["tool_calls"] = [
+                {"name": tool_call["name"], "args": tool_call["args"]}
+                for tool_call in message.tool_calls
+            ]
+        if isinstance(message, ToolMessage):
+            normalized["tool_call_id"] = message.tool_call_id
+        return normalized
+
+    @classmethod
+    def _hash(cls, model: str, messages: List[BaseMessage], **kwargs: Any) -> str:
+        payload = json.dumps(
+            {
+                "model": model,
+                "messages": [cls._normalize(message) for message in messages],
+                **kwargs,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _dumps(result: ChatResult) -> str:
+        return json.dumps(
+            messages_to_dict([generation.message for generation in result.generations])
+        )
+
+    @staticmethod
+    def _loads(raw: bytes) -> ChatResult:
+        return ChatResult(
+            generations=[
+                ChatGeneration(message=message)
+                for message in messages_from_dict(json.loads(raw))
+            ]
+        )
+
+    async def _get(self, key: str) -> Optional[ChatResult]:
+        raw = await self.redis.get(CACHE_KEY_PREFIX + key)
+        return self._loads(raw) if raw is not None else None
+
+    async def lookup(
+        self, model: str, messages: List[BaseMessage], **kwargs: Any
+    ) -> Optional[ChatResult]:
+        """Return a cached result for an exact or near-duplicate request."""
+        try:
+            result = await self._get(self._hash(model, messages, **kwargs))
+            if result is not None or not isinstance(messages[-1], HumanMessage):
+                return result
+
+            # Semantic fallback on the last user turn within the same conversation
+            prefix = self._hash(model, messages[:-1], **kwargs)
+            vector = await self.embeddings.aembed_query(to_string(messages[-1].content))
+            response = await async_client.query_points(
+                collection_name=self.collection_name,
+                query=vector,
+                query_filter=Filter(
+                    must=[
+                        FieldCondition(key="prefix", match=MatchValue(value=prefix)),
+                        FieldCondition(key="expires_at", range=Range(gt=time.time())),
+                    ]
+                ),
+                score_threshold=self.similarity_threshold,
+                limit=1,
+                with_payload=True,
+            )
+            if not response.points:
+                return None
+
+            payload = response.points[0].payload or {}
+            return await self._get(payload["key"])
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            return None
+
+    async def update(
+        self,
+        model: str,
+        messages: List[BaseMessage],
+        result: ChatResult,
+        **kwargs: Any,
+    ) -> None:
+        """Store the result under its exact key and index the last user turn."""
+        try:
+            key = self._hash(model, messages, **kwargs)
+            await self.redis.set(
+                CACHE_KEY_PREFIX + key, self._dumps(result), ex=self.ttl_seconds
+            )
+            await self._purge_expired()
+
+            if not isinstance(messages[-1], HumanMessage):
+                return
+
+            vector = await self.embeddings.aembed_query(to_string(messages[-1].content))
+            await async_client.upsert(
+                collection_name=self.collection_name,
+                points=[
+                    PointStruct(
+                        id=str(uuid.uuid5(uuid.NAMESPACE_OID, key)),
+                        vector=vector,
+                        payload={
+                            "key": key,
+                            "prefix": self._hash(model, messages[:-1], **kwargs),
+                            "expires_at": time.time() + self.ttl_seconds,
+                        },
+                    )
+                ],
+            )
+        except Exception as e:
+            logger.warning(f"LLM cache update failed: {e}")
+
+    def schedule_update(
+        self,
+        model: str,
+        messages: List[BaseMessage],
+        result: ChatResult,
+        **kwargs: Any,
+    ) -> None:
+        """Run `update` in the background, off the response path."""
+        task = asyncio.create_task(self.update(model, list(messages), result, **kwargs))
+        self._pending_updates.add(task)
+        task.add_done_callback(self._pending_updates.discard)
+
+
+# caching is disabled when no redis url is configured
+llm_cache: Optional[LLMCache] = None
+redis_url = get_settings().redis_url
+if redis_url:
+    llm_cache = LLMCache(
+        redis_url=redis_url,
+        ttl_seconds=get_settings().llm_cache_ttl_seconds,
+        similarity_threshold=get_settings().llm_cache_similarity_threshold,
+        collection_name=get_settings().llm_cache_collection_name,
+    )
+
+
+class CachedChatOllama(ChatOllama):
+    """`ChatOllama` that serves repeated requests from `llm_cache`."""
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if llm_cache is None:
+            return await super()._agenerate(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            )
+
+        cached = await llm_cache.lookup(self.model, messages, stop=stop, **kwargs)
+        if cached is not None:
+            return cached
+
+        result = await super()._agenerate(
+            messages, stop=stop, run_manager=run_manager, **kwargs
+        )
+        llm_cache.schedule_update(self.model, messages, result, stop=stop, **kwargs)
+        return result
+
+
+def get_chat_model(model: str, temperature: float) -> ChatOllama:
+    """Return a `CachedChatOllama`, or a plain `ChatOllama` when caching is off."""
+    model_cls = CachedChatOllama if llm_cache is not None else ChatOllama
+    return model_cls(model=model, temperature=temperature)
@@ -1,20 +1,28 @@
 import logging
 import re
-from typing import Counter, Dict, List, Optional
+import zlib
+from typing import Counter, Dict, List, Optional, Tuple
 
 from langchain.schema import Document
-from langchain_ollama import OllamaEmbeddings
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.conversions.common_types import UpdateResult
 from qdrant_client.models import (
     Condition,
     Distance,
     FieldCondition,
     Filter,
+    Fusion,
+    FusionQuery,
     MatchAny,
     MatchValue,
-    NamedSparseVector,
     PointStruct,
+    Prefetch,
+    QuantizationSearchParams,
+    QueryRequest,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
     SparseIndexParams,
     SparseVector,
     SparseVectorParams,
@@ -24,13 +32,38 @@ from qdrant_client.models import (
     VectorParams,
 )
 
+from agents.embeddings import CachedOllamaEmbeddings
 from config.settings_config import get_settings
 
 logger = logging.getLogger(__name__)
 
-client = QdrantClient(url=str(get_settings().qdrant_url))
+# Number of chunks embedded per Ollama request and upserted per Qdrant call
+EMBEDDING_BATCH_SIZE = 64
 
-embeddings = OllamaEmbeddings(
+# Scan the int8 quantized dense vectors, then rescore an oversampled candidate
+# set against the original float32 vectors
+DENSE_SEARCH_PARAMS = SearchParams(
+    quantization=QuantizationSearchParams(rescore=True, oversampling=2.0)
+)
+
+# Module-wide clients over gRPC, so every call reuses one multiplexed HTTP/2
+# channel that keepalive holds open between requests
+QDRANT_GRPC_OPTIONS = {"grpc.keepalive_time_ms": 30000}
+
+client = QdrantClient(
+    url=str(get_settings().qdrant_url),
+    grpc_port=get_settings().qdrant_grpc_port,
+    prefer_grpc=True,
+    grpc_options=QDRANT_GRPC_OPTIONS,
+)
+async_client = AsyncQdrantClient(
+    url=str(get_settings().qdrant_url),
+    grpc_port=get_settings().qdrant_grpc_port,
+    prefer_grpc=True,
+    grpc_options=QDRANT_GRPC_OPTIONS,
+)
+
+embeddings = CachedOllamaEmbeddings(
     model=get_settings().qdrant_embeddings_model,
     base_url=str(get_settings().ollama_base_url),
 )
@@ -47,6 +80,14 @@ def _create_qdrant_collection():
                     distance=Distance.COSINE,
                 ),
             },
+            # int8 copies of the dense vectors, kept in RAM for fast HNSW scans
+            quantization_config=ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=True,
+                )
+            ),
             sparse_vectors_config={
                 "sparse": SparseVectorParams(
                     index=SparseIndexParams(
@@ -90,13 +131,63 @@ def _generate_sparse_vector(
     for i, (word, count) in enumerate(
         word_counts.most_common(min(50, len(word_counts)))
     ):
-        # Use hash of word as index (simplified)
-        index = hash(word) % vocabulary_size
+        # Use a stable hash of word as index, so the same word maps to the same
+        # index across processes (builtin hash() is salted per process)
+        index = zlib.crc32(word.encode("utf-8")) % vocabulary_size
         sparse_vector[index] = float(count)
 
     return sparse_vector
 
 
+def _build_filter(metadata_filter: Optional[Dict] = None) -> Optional[Filter]:
+    """Build a Qdrant filter matching every key/value pair in the metadata."""
+    if not metadata_filter:
+        return None
+
+    conditions: List[Condition] = []
+    for key, value in metadata_filter.items():
+        if isinstance(value, list):
+            conditions.append(FieldCondition(key=key, match=MatchAny(any=value)))
+        else:
+            conditions.append(FieldCondition(key=key, match=MatchValue(value=value)))
+    return Filter(must=conditions)
+
+
+def _format_results(results) -> List[Dict]:
+    formatted_results = []
+    for result in results:
+        formatted_results.append(
+            {
+                "content": result.payload.get("text", ""),
+                "metadata": result.payload.get("metadata", {}),
+                "score": float(result.score),
+                "id": result.id,
+            }
+        )
+    return formatted_results
+
+
+def _filter_by_keywords(query: str, points, limit: int) -> List[Dict]:
+    # Filter results by keyword presence (simple approach)
+    query_words = set(query.lower().split())
+    filtered_results = []
+
+    for point in points:
+        payload = point.payload if point.payload is not None else {}
+        text = payload.get("text", "").lower()
+        if any(word in text for word in query_words):
+            filtered_results.append(
+                {
+                    "content": payload.get("text", ""),
+                    "metadata": payload.get("metadata", {}),
+                    "score": 1.0,  # Simple binary match
+                    "id": point.id,
+                }
+            )
+
+    return filtered_results[:limit]
+
+
 def setup_qdrant():
     try:
         client.get_collection(get_settings().qdrant_upload_collection_name)
@@ -105,56 +196,58 @@ def setup_qdrant():
 
 
 def add_documents_to_qdrant(
-    documents: List[Document], ids: Optional[List[str]] = None
-) -> UpdateResult:
-    points = []
-    for i, doc in enumerate(documents):
-        # Extract text and metadata from Document
-        text = doc.page_content
-        metadata = doc.metadata
-
-        # Generate dense vector
-        dense_vector = embeddings.embed_query(text)
-
-        # Generate sparse vector
-        sparse_vector = _generate_sparse_vector(text)
-
-        # Create point
-        point_id = ids[i] if ids else i
-        point = PointStruct(
-            id=point_id,
-            vector={
-                "dense": dense_vector,
-                "sparse": SparseVector(
-                    indices=list(sparse_vector.keys()),
-                    values=list(sparse_vector.values()),
-                ),
-            },
-            payload={
-                "text": text,
-                "metadata": metadata,
-                **metadata,  # Flatten metadata for easier filtering
-            },
+    documents: List[Document],
+    ids: Optional[List[str]] = None,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+) -> Optional[UpdateResult]:
+    result = None
+    for offset in range(0, len(documents), batch_size):
+        batch = documents[offset : offset + batch_size]
+
+        # Generate dense vectors for the whole batch in a single request
+        dense_vectors = embeddings.embed_documents([doc.page_content for doc in batch])
+
+        points = []
+        for i, (doc, dense_vector) in enumerate(zip(batch, dense_vectors), offset):
+            # Extract text and metadata from Document
+            text = doc.page_content
+            metadata = doc.metadata
+
+            # Generate sparse vector
+            sparse_vector = _generate_sparse_vector(text)
+
+            # Create point
+            point_id = ids[i] if ids else i
+            point = PointStruct(
+                id=point_id,
+                vector={
+                    "dense": dense_vector,
+                    "sparse": SparseVector(
+                        indices=list(sparse_vector.keys()),
+                        values=list(sparse_vector.values()),
+                    ),
+                },
+                payload={
+                    "text": text,
+                    "metadata": metadata,
+                    **metadata,  # Flatten metadata for easier filtering
+                },
+            )
+            points.append(point)
+
+        # Upload points
+        result = client.upsert(
+            collection_name=get_settings().qdrant_upload_collection_name,
+            points=points,
         )
-        points.append(point)
 
-    # Upload points
-    result = client.upsert(
-        collection_name=get_settings().qdrant_upload_collection_name, points=points
-    )
     return result
 
 
 def delete_uploaded_documents(metadata: Dict) -> None:
     """Delete documents from Qdrant by file IDs."""
 
-    conditions: List[Condition] = []
-    for key, value in metadata.items():
-        if isinstance(value, list):
-            conditions.append(FieldCondition(key=key, match=MatchAny(any=value)))
-        else:
-            conditions.append(FieldCondition(key=key, match=MatchValue(value=value)))
-    qdrant_filter = Filter(must=conditions)
+    qdrant_filter = _build_filter(metadata)
 
     # Perform deletion
     client.delete(
@@ -206,96 +299,117 @@ def _reciprocal_rank_fusion(dense_results, sparse_results, alpha=0.5, k=60):
     return results
 
 
-def search_from_qdrant(
+def _to_sparse_vector(sparse_query: Dict[int, float]) -> SparseVector:
+    return SparseVector(
+        indices=list(sparse_query.keys()), values=list(sparse_query.values())
+    )
+
+
+def _dense_sparse_requests(
+    dense_query: List[float],
+    sparse_query: Dict[int, float],
+    qdrant_filter: Optional[Filter],
+    k: int,
+) -> List[QueryRequest]:
+    """Dense and sparse query requests feeding reciprocal rank fusion."""
+    return [
+        QueryRequest(
+            query=dense_query,
+            using="dense",
+            filter=qdrant_filter,
+            params=DENSE_SEARCH_PARAMS,
+            limit=k * 2,  # Get more results for fusion
+            with_payload=True,
+        ),
+        QueryRequest(
+            query=_to_sparse_vector(sparse_query),
+            using="sparse",
+            filter=qdrant_filter,
+            limit=k * 2,
+            with_payload=True,
+        ),
+    ]
+
+
+def _rrf_prefetch(
+    dense_query: List[float],
+    sparse_query: Dict[int, float],
+    qdrant_filter: Optional[Filter],
+    k: int,
+) -> List[Prefetch]:
+    """Dense and sparse prefetches for Qdrant-native RRF fusion."""
+    return [
+        Prefetch(
+            query=dense_query,
+            using="dense",
+            filter=qdrant_filter,
+            params=DENSE_SEARCH_PARAMS,
+            limit=k * 2,
+        ),
+        Prefetch(
+            query=_to_sparse_vector(sparse_query),
+            using="sparse",
+            filter=qdrant_filter,
+            limit=k * 2,
+        ),
+    ]
+
+
+async def aembed_query_vectors(query: str) -> Tuple[List[float], Dict[int, float]]:
+    """Compute the dense and sparse vectors for a query once, for reuse."""
+    return await embeddings.aembed_query(query), _generate_sparse_vector(query)
+
+
+async def asearch_from_qdrant(
     query: str,
     k: int = 5,
     alpha: float = 0.5,
     metadata_filter: Optional[Dict] = None,
 ) -> List[Dict]:
+    """Hybrid dense + sparse search, fused with RRF weighted by alpha."""
     # Generate query vectors
-    dense_query = embeddings.embed_query(query)
-    sparse_query = _generate_sparse_vector(query)
+    dense_query, sparse_query = await aembed_query_vectors(query)
 
     # Build filter
-    qdrant_filter = None
-    if metadata_filter:
-        conditions = []
-        for key, value in metadata_filter.items():
-            if isinstance(value, list):
-                conditions.append(FieldCondition(key=key, match=MatchAny(any=value)))
-            else:
-                conditions.append(
-                    FieldCondition(key=key, match=MatchValue(value=value))
-                )
-        qdrant_filter = Filter(must=conditions)
-
-    # Perform dense search
-    dense_results = client.search(
-        collection_name=get_settings().qdrant_upload_collection_name,
-        query_vector=("dense", dense_query),
-        query_filter=qdrant_filter,
-        limit=k * 2,  # Get more results for fusion
-        with_payload=True,
-        with_vectors=False,
-    )
+    qdrant_filter = _build_filter(metadata_filter)
 
-    # Perform sparse search
-    query_vector = NamedSparseVector(
-        name="sparse",
-        vector=SparseVector(
-            indices=list(sparse_query.keys()), values=list(sparse_query.values())
-        ),
-    )
+    # With equal weights, let Qdrant fuse both legs natively in a single query
+    if alpha == 0.5:
+        response = await async_client.query_points(
+            collection_name=get_settings().qdrant_upload_collection_name,
+            prefetch=_rrf_prefetch(dense_query, sparse_query, qdrant_filter, k),
+            query=FusionQuery(fusion=Fusion.RRF),
+            limit=k,
+            with_payload=True,
+        )
+        return _format_results(response.points)
 
-    sparse_results = client.search(
+    # Otherwise weight the legs by alpha, fetching both in one round-trip
+    dense_response, sparse_response = await async_client.query_batch_points(
         collection_name=get_settings().qdrant_upload_collection_name,
-        query_vector=query_vector,
-        query_filter=qdrant_filter,
-        limit=k * 2,
-        with_payload=True,
-        with_vectors=False,
+        requests=_dense_sparse_requests(dense_query, sparse_query, qdrant_filter, k),
     )
+    dense_results, sparse_results = dense_response.points, sparse_response.points
 
     # Combine results using reciprocal rank fusion
     combined_results = _reciprocal_rank_fusion(
         dense_results, sparse_results, alpha=alpha
     )
 
-    # Format results
-    formatted_results = []
-    for result in combined_results[:k]:
-        formatted_results.append(
-            {
-                "content": result.payload.get("text", ""),
-                "metadata": result.payload.get("metadata", {}),
-                "score": float(result.score),
-                "id": result.id,
-            }
-        )
-
-    return formatted_results
+    return _format_results(combined_results[:k])
 
 
-def keyword_search_from_qdrant(
+async def akeyword_search_from_qdrant(
     query: str,
     limit: int = 5,
     metadata_filter: Optional[Dict] = None,
 ) -> List[Dict]:
+    """Scroll the filtered points and keep those containing any query word."""
     # Build filter
-    qdrant_filter = None
-    if metadata_filter:
-        conditions = []
-        for key, value in metadata_filter.items():
-            if isinstance(value, list):
-                conditions.append(FieldCondition(key=key, match=MatchAny(any=value)))
-            else:
-                conditions.append(
-                    FieldCondition(key=key, match=MatchValue(value=value))
-                )
-        qdrant_filter = Filter(must=conditions)
+    qdrant_filter = _build_filter(metadata_filter)
 
     # Perform keyword search
-    results, _ = client.scroll(
+    results, _ = await async_client.scroll(
         collection_name=get_settings().qdrant_upload_collection_name,
         scroll_filter=qdrant_filter,
         limit=limit,
@@ -303,21 +417,54 @@ def keyword_search_from_qdrant(
         with_vectors=False,
     )
 
-    # Filter results by keyword presence (simple approach)
-    query_words = set(query.lower().split())
-    filtered_results = []
+    return _filter_by_keywords(query, results, limit)
 
-    for point in results:  # results is (points, next_page_offset)
-        payload = point.payload if point.payload is not None else {}
-        text = payload.get("text", "").lower()
-        if any(word in text for word in query_words):
-            filtered_results.append(
-                {
-                    "content": payload.get("text", ""),
-                    "metadata": payload.get("metadata", {}),
-                    "score": 1.0,  # Simple binary match
-                    "id": point.id,
-                }
-            )
 
-    return filtered_results[:limit]
+async def acompare_search_from_qdrant(
+    query: str,
+    k: int = 5,
+    metadata_filter: Optional[Dict] = None,
+) -> Tuple[List[Dict], List[Dict], List[Dict], List[Dict]]:
+    """
+    Run hybrid (alpha=0.5), dense (alpha=1.0), sparse (alpha=0.0) and keyword
+    search in a single batched request.
+
+    Hybrid uses the same Qdrant-native RRF query as `asearch_from_qdrant`, the
+    dense and sparse legs are fetched once and fused per alpha locally, and the
+    keyword scan rides along as a query without a vector.
+    """
+    dense_query, sparse_query = await aembed_query_vectors(query)
+    qdrant_filter = _build_filter(metadata_filter)
+
+    (
+        hybrid_response,
+        dense_response,
+        sparse_response,
+        keyword_response,
+    ) = await async_client.query_batch_points(
+        collection_name=get_settings().qdrant_upload_collection_name,
+        requests=[
+            QueryRequest(
+                prefetch=_rrf_prefetch(dense_query, sparse_query, qdrant_filter, k),
+                query=FusionQuery(fusion=Fusion.RRF),
+                limit=k,
+                with_payload=True,
+            ),
+            *_dense_sparse_requests(dense_query, sparse_query, qdrant_filter, k),
+            QueryRequest(filter=qdrant_filter, limit=k, with_payload=True),
+        ],
+    )
+
+    hybrid = _format_results(hybrid_response.points)
+    # Fusion overwrites scores on the shared points, so format after each fusion
+    dense, sparse = (
+        _format_results(
+            _reciprocal_rank_fusion(
+                dense_response.points, sparse_response.points, alpha=alpha
+            )[:k]
+        )
+        for alpha in (1.0, 0.0)
+    )
+    keyword = _filter_by_keywords(query, keyword_response.points, k)
+
+    return hybrid, dense, sparse, keyword
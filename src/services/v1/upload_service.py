@@ -1,22 +1,22 @@
+import asyncio
+import fcntl
+import json
 import logging
 import os
+import shutil
+import time
+import uuid
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime
+from importlib import import_module
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Type
 
 import aiofiles
 from fastapi import HTTPException, Request
 from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import (
-    CSVLoader,
-    JSONLoader,
-    PyMuPDFLoader,
-    TextLoader,
-    UnstructuredExcelLoader,
-    UnstructuredPowerPointLoader,
-    UnstructuredWordDocumentLoader,
-)
+from langchain_core.document_loaders import BaseLoader
 
 from api.v1.schema.upload import UploadFileChunkResponse
 from config.settings_config import get_settings
@@ -24,26 +24,63 @@ from core.qdrant import add_documents_to_qdrant, delete_uploaded_documents
 
 logger = logging.getLogger(__name__)
 
+
+def _lazy_loader(name: str) -> Callable[[], Type[BaseLoader]]:
+    """Defer importing a loader (and its parsing dependencies) until first use"""
+
+    def _load() -> Type[BaseLoader]:
+        return getattr(import_module("langchain_community.document_loaders"), name)
+
+    return _load
+
+
 SUPPORTED_EXTENSIONS = {
-    ".txt": TextLoader,
-    ".pdf": PyMuPDFLoader,
-    ".csv": CSVLoader,
-    ".docx": UnstructuredWordDocumentLoader,
-    ".doc": UnstructuredWordDocumentLoader,
-    ".xlsx": UnstructuredExcelLoader,
-    ".xls": UnstructuredExcelLoader,
-    ".pptx": UnstructuredPowerPointLoader,
-    ".ppt": UnstructuredPowerPointLoader,
-    ".json": JSONLoader,
+    ".txt": _lazy_loader("TextLoader"),
+    ".pdf": _lazy_loader("PyMuPDFLoader"),
+    ".csv": _lazy_loader("CSVLoader"),
+    ".docx": _lazy_loader("UnstructuredWordDocumentLoader"),
+    ".doc": _lazy_loader("UnstructuredWordDocumentLoader"),
+    ".xlsx": _lazy_loader("UnstructuredExcelLoader"),
+    ".xls": _lazy_loader("UnstructuredExcelLoader"),
+    ".pptx": _lazy_loader("UnstructuredPowerPointLoader"),
+    ".ppt": _lazy_loader("UnstructuredPowerPointLoader"),
+    ".json": _lazy_loader("JSONLoader"),
 }
 
+# Shared splitter; it holds no per-call state, so one instance is reused
+TEXT_SPLITTER = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+
+# Sidecar file recording which file an upload is for, how many chunks, and how
+# many bytes, have been appended to the final file, and the upload's status
+UPLOAD_STATE_FILE = ".upload_state"
+
+# Upload statuses: chunks still arriving, the final file being ingested, and
+# the file ingested (kept as a marker so retries are answered as complete)
+UPLOAD_RECEIVING = "receiving"
+UPLOAD_PROCESSING = "processing"
+UPLOAD_DONE = "done"
+
+# Buffered chunks copied into the final file at the same time
+MERGE_CONCURRENCY = 4
+
+# Block size used when copy_file_range is unavailable
+COPY_BLOCK_SIZE = 1024 * 1024
+
+# File locked while a request works on an upload, shared by every worker process
+UPLOAD_LOCK_FILE = ".lock"
+
+# How often a request waiting on the upload lock retries it
+UPLOAD_LOCK_POLL_SECONDS = 0.01
+
 
 def get_loader(file_path: str, file_extension: str):
     """Get appropriate loader for file type"""
-    loader_class = SUPPORTED_EXTENSIONS.get(file_extension.lower())
-    if not loader_class:
+    loader_factory = SUPPORTED_EXTENSIONS.get(file_extension.lower())
+    if not loader_factory:
         raise ValueError(f"Unsupported file type: {file_extension}")
 
+    loader_class: Any = loader_factory()
+
     # Special handling for JSON files
     if file_extension.lower() == ".json":
         return loader_class(file_path, jq_schema=".", text_content=False)
@@ -69,12 +106,7 @@ def process_file(
         doc.metadata["processed_at"] = datetime.now().isoformat()
 
     # Split documents into chunks
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        length_function=len,
-    )
-    chunks = text_splitter.split_documents(documents)
+    chunks = TEXT_SPLITTER.split_documents(documents)
 
     # Add chunk metadata
     for i, split in enumerate(chunks):
@@ -84,6 +116,162 @@ def process_file(
     return chunks
 
 
+def _upload_dir(file_id: str) -> str:
+    """Temp dir of an upload; the id comes from the client, so it must not
+    point outside upload_temp_dir"""
+    if file_id in (".", "..") or os.path.basename(file_id) != file_id:
+        raise HTTPException(status_code=400, detail="Invalid file id")
+
+    return os.path.join(get_settings().upload_temp_dir, file_id)
+
+
+def _read_upload_state(temp_dir: str) -> Optional[Dict[str, Any]]:
+    """File name, total chunks, next chunk expected, committed size of the final
+    file and status of an upload, or None if there is no upload in progress"""
+    state_path = os.path.join(temp_dir, UPLOAD_STATE_FILE)
+    if not os.path.exists(state_path):
+        return None
+
+    with open(state_path) as f:
+        return json.load(f)
+
+
+def _write_upload_state(temp_dir: str, state: Dict[str, Any]) -> None:
+    state_path = os.path.join(temp_dir, UPLOAD_STATE_FILE)
+    with open(f"{state_path}.tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(f"{state_path}.tmp", state_path)
+
+
+def _discard_upload(temp_dir: str, state: Optional[Dict[str, Any]]) -> None:
+    """Remove the final file, buffered chunks and state of an upload, leaving
+    chunks still being received alone"""
+    paths = []
+    if state is not None:
+        paths.append(os.path.join(temp_dir, state["file_name"]))
+        paths.append(os.path.join(temp_dir, UPLOAD_STATE_FILE))
+
+    chunks_dir = os.path.join(temp_dir, "chunks")
+    if os.path.isdir(chunks_dir):
+        with os.scandir(chunks_dir) as entries:
+            paths.extend(
+                entry.path for entry in entries if not entry.name.endswith(".part")
+            )
+
+    for path in paths:
+        with suppress(FileNotFoundError):
+            os.remove(path)
+
+
+@asynccontextmanager
+async def _upload_lock(temp_dir: str) -> AsyncIterator[None]:
+    """Hold an exclusive lock on an upload across requests and worker processes.
+
+    The lock is polled rather than waited on in an executor thread, so waiting
+    requests don't tie up the default executor"""
+    fd = os.open(os.path.join(temp_dir, UPLOAD_LOCK_FILE), os.O_RDWR | os.O_CREAT)
+    try:
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                await asyncio.sleep(UPLOAD_LOCK_POLL_SECONDS)
+        yield
+    finally:
+        # Closing the descriptor releases the lock
+        os.close(fd)
+
+
+def _remove_stale_uploads() -> None:
+    """Remove upload dirs untouched for longer than upload_stale_seconds, which
+    covers both abandoned uploads and the markers left by completed ones"""
+    upload_temp_dir = get_settings().upload_temp_dir
+    cutoff = time.time() - get_settings().upload_stale_seconds
+
+    with os.scandir(upload_temp_dir) as entries:
+        for entry in entries:
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def _copy_file(src_path: str, dst_fd: int, offset: int) -> None:
+    """Copy a file into an open descriptor at the given offset, zero-copy where
+    the OS and filesystem support it"""
+    with open(src_path, "rb") as infile:
+        src_fd = infile.fileno()
+        remaining = os.fstat(src_fd).st_size
+        src_offset = 0
+        zero_copy = hasattr(os, "copy_file_range")
+
+        while remaining > 0:
+            if zero_copy:
+                try:
+                    copied = os.copy_file_range(
+                        src_fd, dst_fd, remaining, src_offset, offset + src_offset
+                    )
+                except OSError:
+                    # ENOSYS, EXDEV, EOPNOTSUPP, EINVAL... on some kernels and
+                    # filesystems (overlayfs, NFS); copy the rest in userspace
+                    zero_copy = False
+                    continue
+            else:
+                data = os.pread(src_fd, min(remaining, COPY_BLOCK_SIZE), src_offset)
+                copied = os.pwrite(dst_fd, data, offset + src_offset)
+            if copied == 0:
+                break
+            src_offset += copied
+            remaining -= copied
+
+
+async def _append_buffered_chunks(
+    chunks_dir: str, final_path: str, next_chunk: int, size: int
+) -> Tuple[int, int]:
+    """Append the received chunks that are now contiguous, returning the next
+    chunk expected and the new size of the final file"""
+    chunk_files: List[str] = []
+    while True:
+        chunk_file = os.path.join(chunks_dir, f"chunk_{next_chunk + len(chunk_files)}")
+        if not os.path.exists(chunk_file):
+            break
+        chunk_files.append(chunk_file)
+
+    if not chunk_files:
+        return next_chunk, size
+
+    # Every chunk lands at a known offset, so the copies can overlap
+    offsets = []
+    offset = size
+    for chunk_file in chunk_files:
+        offsets.append(offset)
+        offset += os.path.getsize(chunk_file)
+
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(MERGE_CONCURRENCY)
+
+    async def _copy(chunk_file: str, offset: int) -> None:
+        async with semaphore:
+            await loop.run_in_executor(None, _copy_file, chunk_file, fd, offset)
+
+    fd = os.open(final_path, os.O_WRONLY | os.O_CREAT)
+    try:
+        # Drop any bytes an interrupted append left past the committed size
+        os.ftruncate(fd, size)
+        await asyncio.gather(
+            *(
+                _copy(chunk_file, offset)
+                for chunk_file, offset in zip(chunk_files, offsets)
+            )
+        )
+    finally:
+        os.close(fd)
+
+    for chunk_file in chunk_files:
+        os.remove(chunk_file)
+
+    return next_chunk + len(chunk_files), offset
+
+
 async def upload_file_chunks(
     request: Request,
     file_id: str,
@@ -91,55 +279,100 @@ async def upload_file_chunks(
     chunk_index: int,
     total_chunks: int,
 ) -> UploadFileChunkResponse:
-    temp_dir = os.path.join(get_settings().upload_temp_dir, file_id)
+    temp_dir = _upload_dir(file_id)
     chunks_dir = os.path.join(temp_dir, "chunks")
     os.makedirs(chunks_dir, exist_ok=True)
 
+    final_path = os.path.join(temp_dir, file_name)
     chunk_path = os.path.join(chunks_dir, f"chunk_{chunk_index}")
 
-    # Save each chunk
-    async with aiofiles.open(chunk_path, "wb") as f:
-        async for chunk in request.stream():
-            await f.write(chunk)
-        await f.flush()
-
-    # If it's the last chunk, merge them all
-    if chunk_index == total_chunks - 1:
-        final_path = os.path.join(temp_dir, file_name)
-
-        async with aiofiles.open(final_path, "wb") as outfile:
-            for i in range(total_chunks):
-                chunk_file = os.path.join(chunks_dir, f"chunk_{i}")
-                if not os.path.exists(chunk_file):
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Missing chunk {i}. Upload incomplete.",
-                    )
+    # Receive the chunk before taking the lock, so chunks of one file can upload
+    # in parallel; it is renamed into place only once fully received
+    part_path = f"{chunk_path}.{uuid.uuid4().hex}.part"
+    try:
+        async with aiofiles.open(part_path, "wb") as f:
+            async for chunk in request.stream():
+                await f.write(chunk)
+            await f.flush()
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.remove(part_path)
+        raise
 
-                async with aiofiles.open(chunk_file, "rb") as infile:
-                    content = await infile.read()
-                    await outfile.write(content)
-                    await outfile.flush()
+    process_upload = False
+    async with _upload_lock(temp_dir):
+        state = _read_upload_state(temp_dir)
 
-                # os.remove(chunk_file)
+        # A different file under a reused id starts a new upload rather than
+        # being mistaken for retries of the previous one
+        if state is None or (state["file_name"], state["total_chunks"]) != (
+            file_name,
+            total_chunks,
+        ):
+            _discard_upload(temp_dir, state)
+            state = {
+                "file_name": file_name,
+                "total_chunks": total_chunks,
+                "next_chunk": 0,
+                "size": 0,
+                "status": UPLOAD_RECEIVING,
+            }
 
-        try:
-            documents = process_file(file_id, final_path)
-            add_documents_to_qdrant(documents)
-        except Exception as e:
-            logger.error(f"File processing failed: {e}")
-            raise HTTPException(status_code=500, detail="File processing failed")
-        # finally:
-        #     shutil.rmtree(temp_dir, ignore_errors=True)
+        if state["status"] != UPLOAD_RECEIVING or chunk_index < state["next_chunk"]:
+            # Already appended, so this is a retry
+            os.remove(part_path)
+        else:
+            # Buffer the chunk, then append it and any chunks that were waiting
+            # on it once they are contiguous with the final file
+            os.replace(part_path, chunk_path)
+            next_chunk, size = await _append_buffered_chunks(
+                chunks_dir, final_path, state["next_chunk"], state["size"]
+            )
+            state.update(next_chunk=next_chunk, size=size)
 
+            # Only the request that appends the last chunk processes the file
+            if next_chunk >= total_chunks:
+                state["status"] = UPLOAD_PROCESSING
+                process_upload = True
+            _write_upload_state(temp_dir, state)
+
+    # Chunks may still be in flight, or the file is being ingested by another
+    # request; only report the upload complete once ingestion has succeeded
+    if not process_upload:
         return UploadFileChunkResponse(
             file_name=file_name,
             file_id=file_id,
-            complete=True,
+            complete=state["status"] == UPLOAD_DONE,
+        )
+
+    loop = asyncio.get_running_loop()
+
+    try:
+        # Parse in the process pool so CPU-bound loaders don't block the loop
+        documents = await loop.run_in_executor(
+            request.app.state.doc_pool, process_file, file_id, final_path
         )
+        # Embedding and upserting make blocking HTTP calls, so keep them off it too
+        await loop.run_in_executor(None, add_documents_to_qdrant, documents)
+    except Exception as e:
+        logger.error(f"File processing failed: {e}")
+        # Start over, so the client can upload the file again
+        async with _upload_lock(temp_dir):
+            _discard_upload(temp_dir, state)
+        raise HTTPException(status_code=500, detail="File processing failed")
+
+    # Keep only the upload state, marking the upload done for retries
+    async with _upload_lock(temp_dir):
+        state["status"] = UPLOAD_DONE
+        _write_upload_state(temp_dir, state)
+        os.remove(final_path)
+    await loop.run_in_executor(None, _remove_stale_uploads)
 
-    return UploadFileChunkResponse(file_name=file_name, file_id=file_id, complete=False)
+    return UploadFileChunkResponse(file_name=file_name, file_id=file_id, complete=True)
 
 
 def delete_uploaded_file(file_id: str) -> None:
     delete_uploaded_documents({"file_id": file_id})
+
+    # Drop the upload state too, so the id can be used to upload the file again
+    shutil.rmtree(_upload_dir(file_id), ignore_errors=True)